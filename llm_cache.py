@@ -0,0 +1,75 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+from patterns import ChatModel
+
+
+def make_cache_key(model_id: str, messages: List[Dict[str, Any]], **params) -> str:
+    """Hash the model id, canonicalized messages and generation params."""
+    payload = json.dumps(
+        {"model": model_id, "messages": messages, "params": params},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class LLMCache:
+    """In-memory LRU cache of model responses with a time-to-live (seconds)."""
+    maxsize: int = 256
+    ttl: float = 3600.0
+    _entries: "OrderedDict[str, Tuple[float, str]]" = field(default_factory=OrderedDict, repr=False)
+    # Guards _entries; batch helpers call generate from worker threads
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def generate(self, model: ChatModel, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        Call model.generate, answering repeated prompts from the cache.
+
+        Only calls made with temperature=0 are cached. Sampled calls are
+        expected to differ, and the retry loops rely on getting a fresh
+        response for the same messages.
+        """
+        if kwargs.get("temperature") != 0:
+            return model.generate(messages, **kwargs)
+
+        cfg = getattr(model, "cfg", None)
+        model_id = getattr(cfg, "model_id", type(model).__name__)
+        key = make_cache_key(model_id, messages, **kwargs)
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        response = model.generate(messages, **kwargs)
+        self.set(key, response)
+        return response
@@ -1,12 +1,42 @@
 # util.py - System prompt generation utilities with refactored common patterns
+#
+# Prompt layout invariant: static prefix first. System prompts start with
+# the instruction files and definitions and put any per-call text last,
+# and user messages lead with the context before the per-call structure,
+# so provider-side prefix caching can reuse the shared prefix across calls.
 from config import setup_env
-from patterns import ModelConfig, OpenAIChat
-from typing import Final, Optional, Dict, List, Tuple, Callable, Any
+from patterns import ModelConfig, OpenAIChat, PromptTemplate
+from llm_cache import LLMCache
+from typing import Final, Optional, Dict, List, Tuple, Callable, Any, Iterator, FrozenSet, Sequence
+from functools import lru_cache, partial
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import hashlib
+import heapq
+import asyncio
+import atexit
+import io
 import json
+import math
+import os
+import struct
+import tempfile
 import textwrap
 import subprocess
 import sys
 import re
+import wave
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import winsound  # Windows only
+except ImportError:
+    winsound = None
 
 # Global model configuration - Single shared client
 setup_env()
@@ -14,6 +44,131 @@ MODEL_CONFIG: Final = ModelConfig(
     model_id="gpt-5", temperature=0.8, max_tokens=3000
 )
 DEFAULT_MODEL = OpenAIChat(MODEL_CONFIG)
+LLM_CACHE = LLMCache(maxsize=256, ttl=3600)
+# Non-interactive formalize_system_prompt results, keyed on a hash of the
+# exact prompt text
+FORMALIZE_CACHE = LLMCache(maxsize=64, ttl=3600)
+
+# Separator line for iteration banners
+_BANNER: Final = "=" * 60
+
+# Single worker so notification sounds never overlap or block generation
+_NOTIFY_EXECUTOR: Final = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notify")
+
+# orjson is optional; its JSONDecodeError subclasses json.JSONDecodeError
+_json_loads: Final = orjson.loads if orjson is not None else json.loads
+_JSON_DECODER: Final = json.JSONDecoder()
+
+# Precompiled patterns used by the validators
+_RE_BLOCK: Final = re.compile(r'\[([A-Z_]+)\]')
+_RE_COMPLEX: Final = re.compile(r'#([^#]+)#')
+_RE_PAREN: Final = re.compile(r'\(([^)]+)\)')
+_RE_UNDERSCORE: Final = re.compile(r'__[^_]+__')
+_RE_LEADING_PAREN: Final = re.compile(r'^\s*\([^)]+\)')
+
+# Tagged sections of a unified pipeline response, mapped to result keys
+_PIPELINE_SECTIONS: Final = {
+    "COMPLEX_BLOCK": "complex_block",
+    "WITH_SYSINFO": "with_system_info",
+    "POPULATED": "populated",
+}
+_RE_PIPELINE_SECTION: Final = re.compile(
+    r'<(COMPLEX_BLOCK|WITH_SYSINFO|POPULATED)>(.*?)</\1>', re.DOTALL
+)
+
+# Keys every generated user context must define
+_CONTEXT_REQUIRED_KEYS: Final = (
+    "user_name",
+    "user_role",
+    "user_personality",
+    "what_they_are_doing_for_current_task",
+    "conversation_flow",
+)
+
+# Building blocks every structured response must mention, in report order
+_STRUCTURED_REQUIRED_BLOCKS: Final = (
+    "CONTEXT_INFORMATION",
+    "TOOL_USE_INSTRUCTIONS",
+    "USER_PREFERENCES",
+    "BACKGROUND_INFORMATION",
+    "TONAL_CONTROL",
+)
+
+
+# User message templates, rendered once per call by the generation functions
+_CONTEXT_TEMPLATE: Final = PromptTemplate(
+    "Create 5 diverse user contexts based on this inspiration: {inspiration}"
+)
+
+_CONTEXT_FEEDBACK_TEMPLATE: Final = PromptTemplate("""Create 5 diverse user contexts based on this inspiration: {inspiration} that suitable for the following tools: {tools}
+
+Previous feedback from user:
+{feedback}
+
+Please incorporate this feedback and generate improved contexts.""")
+
+_BLOCK_TEMPLATE: Final = PromptTemplate("""Transform these ideas using different wording and distribute them naturally across the paragraphs. They can appear at any position within each paragraph.
+
+Inspiration ideas to incorporate throughout the paragraphs is in bullet points.
+INSPIRATION: 
+
+{inspiration}
+
+ONLY RETURN THE BLOCK STRUCTURE, NO OTHER TEXT.""")
+
+_COMPLEX_BLOCK_TEMPLATE: Final = PromptTemplate("""Context: {context}
+
+Add relevant complex block identifiers to this building block structure:
+
+{block_output}
+
+ONLY RETURN THE COMPLEX BLOCK STRUCTURE, NO OTHER TEXT.""")
+
+_POPULATE_TEMPLATE: Final = PromptTemplate("""Convert this structured block format into a natural English system prompt:
+
+CONTEXT:
+{context}
+
+REQUIRED TEXT (must include word-for-word): could be empty if not provided
+"{must}"
+
+STRUCTURED INPUT:
+{complex_block}
+
+ONLY RETURN THE SYSTEM PROMPT, NO OTHER TEXT.""")
+
+_SYSTEM_INFO_TEMPLATE: Final = PromptTemplate("""CONTEXT:
+{context}
+
+SYSTEM SETTINGS:
+{system_settings}
+
+COMPLEX STRUCTURE:
+{complex_structure}
+
+return the system prompt in the same format as the complex structure with the system info added to the first CONTEXT_INFORMATION block.
+
+ONLY RETURN THE SYSTEM PROMPT, NO OTHER TEXT.""")
+
+_PIPELINE_TEMPLATE: Final = PromptTemplate("""CONTEXT:
+{context}
+
+SYSTEM SETTINGS:
+{system_settings}
+
+REQUIRED TEXT (must include word-for-word): could be empty if not provided
+"{must}"
+
+BUILDING BLOCK STRUCTURE:
+{block_output}
+
+ONLY RETURN THE THREE TAGGED SECTIONS, NO OTHER TEXT.""")
+
+_FORMALIZE_TEMPLATE: Final = PromptTemplate("""Please formalize this system prompt using direct, natural English with proper sentence subjects:
+
+{system_prompt}
+
+Remember: Do NOT change any text inside quotation marks. Only improve the language structure and directness.""")
 
 
 # ==================== SUPPORT FUNCTIONS ====================
@@ -21,14 +176,63 @@ DEFAULT_MODEL = OpenAIChat(MODEL_CONFIG)
 
 def load_json_file(file_path: str) -> Dict[str, Any]:
     """Load and return JSON data from file."""
-    with open(file_path, "r") as f:
+    if orjson is not None:
+        return orjson.loads(Path(file_path).read_bytes())
+    with open(file_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
 def load_text_file(file_path: str) -> str:
     """Load and return text content from file."""
-    with open(file_path, "r") as f:
-        return f.read()
+    return Path(file_path).read_text(encoding="utf-8")
+
+
+@lru_cache(maxsize=32)
+def _load_json_cached(file_path: str) -> Dict[str, Any]:
+    """Load JSON data from a static config file once per process."""
+    return load_json_file(file_path)
+
+
+@lru_cache(maxsize=32)
+def _load_text_cached(file_path: str) -> str:
+    """Load text from a static instruction file once per process."""
+    return load_text_file(file_path)
+
+
+@lru_cache(maxsize=1)
+def _block_definitions() -> str:
+    """Purpose and rule of every building block, rendered once for prompts."""
+    build_blocks = _load_json_cached("./build_block.json")
+    return "".join(
+        f"\n{block_name.upper()}:\n"
+        f"Purpose: {block_data['what_it_is']}\n"
+        f"Rule: {block_data['rule']}\n"
+        for block_name, block_data in build_blocks.items()
+    )
+
+
+@lru_cache(maxsize=1)
+def _complex_definitions() -> str:
+    """Definition of every complex block, rendered once for prompts."""
+    complex_blocks = _load_json_cached("./complex_block.json")
+    return "".join(
+        f"\n{block_name}:\nDefinition: {block_data['Definition']}\n"
+        for block_name, block_data in complex_blocks.items()
+    )
+
+
+def cached_generate(messages: List[Dict[str, str]], **kwargs) -> str:
+    """Generate with DEFAULT_MODEL, reusing cached responses for temperature=0 calls."""
+    return LLM_CACHE.generate(DEFAULT_MODEL, messages, **kwargs)
+
+
+def _generate_once(system_prompt: str, user_message: str) -> str:
+    """Send a single system + user exchange to the model."""
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_message}
+    ]
+    return cached_generate(messages)
 
 
 def print_wrapped(text: str, width: int = 150, indent: str = "") -> None:
@@ -44,136 +248,157 @@ def print_wrapped(text: str, width: int = 150, indent: str = "") -> None:
         print(text)
         return
     
+    # Fast path: text this short cannot contain a line that needs wrapping
+    if len(text) <= width:
+        print(text)
+        return
+
     # Split by existing newlines to preserve intentional line breaks
     lines = text.split('\n')
+    if max(map(len, lines)) <= width:
+        print(text)
+        return
+
+    wrapper = textwrap.TextWrapper(
+        width=width,
+        initial_indent=indent,
+        subsequent_indent=indent,
+        break_long_words=False,
+        break_on_hyphens=False
+    )
+    
+    output = []
     
     for line in lines:
         if len(line) <= width:
-            print(line)
+            output.append(line)
         else:
             # Wrap long lines
-            wrapped_lines = textwrap.fill(
-                line, 
-                width=width,
-                initial_indent=indent,
-                subsequent_indent=indent,
-                break_long_words=False,
-                break_on_hyphens=False
-            )
-            print(wrapped_lines)
+            output.append(wrapper.fill(line))
+
+    # Single write instead of one print per line
+    sys.stdout.write('\n'.join(output) + '\n')
+
+
+def _detect_platform() -> str:
+    """Return "wsl", "linux", "darwin", "win" or "other" for this process."""
+    # Check if running in WSL environment
+    try:
+        with open('/proc/version', 'r') as f:
+            version_info = f.read().lower()
+            if 'microsoft' in version_info or 'wsl' in version_info:
+                return "wsl"
+    except (FileNotFoundError, PermissionError):
+        pass
+
+    if sys.platform.startswith('linux'):
+        return "linux"
+    if sys.platform == 'darwin':
+        return "darwin"
+    if sys.platform.startswith('win'):
+        return "win"
+    return "other"
+
+
+def _build_beep_wav(
+    frequency: int = 800, beep_ms: int = 200, gap_ms: int = 100,
+    count: int = 3, rate: int = 8000
+) -> bytes:
+    """Render `count` sine beeps separated by silence as a 16-bit mono WAV."""
+    beep = [
+        int(12000 * math.sin(2 * math.pi * frequency * i / rate))
+        for i in range(rate * beep_ms // 1000)
+    ]
+    gap = [0] * (rate * gap_ms // 1000)
+    samples = (beep + gap) * (count - 1) + beep
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+    return buffer.getvalue()
+
+
+_BEEP_WAV: Final = _build_beep_wav()
+
+
+@lru_cache(maxsize=1)
+def _beep_wav_path() -> str:
+    """Write the beep WAV to a private temp file once and return its path."""
+    # mkstemp creates a new file exclusively, so a shared temp directory
+    # cannot redirect the write and concurrent processes never share it
+    fd, path = tempfile.mkstemp(prefix="antechamber_beep_", suffix=".wav")
+    with os.fdopen(fd, "wb") as f:
+        f.write(_BEEP_WAV)
+    atexit.register(_remove_quietly, path)
+    return path
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _ring_terminal_bell() -> bool:
+    """Emit 3 terminal bell characters in one write."""
+    sys.stdout.write('\a\a\a')
+    sys.stdout.flush()
+    return True
+
+
+def _play_wav_with(player: List[str]) -> bool:
+    """Start a command-line player on the beep WAV without waiting for it."""
+    try:
+        subprocess.Popen(
+            player + [_beep_wav_path()],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        return True
+    except OSError:
+        return False
+
+
+def _beep_windows() -> bool:
+    """Play the beep WAV asynchronously through winsound."""
+    if winsound is None:
+        return False
+    winsound.PlaySound(_beep_wav_path(), winsound.SND_FILENAME | winsound.SND_ASYNC)
+    return True
+
+
+# Platform never changes during a run, so detect it once and dispatch on it
+_PLATFORM: Final = _detect_platform()
+_BEEP_HANDLERS: Final[Dict[str, Callable[[], bool]]] = {
+    "wsl": _ring_terminal_bell,
+    "linux": lambda: _play_wav_with(['aplay', '-q']),
+    "darwin": lambda: _play_wav_with(['afplay']),
+    "win": _beep_windows,
+}
 
 
 def play_notification_sound() -> None:
     """
     Play 3 notification sounds to indicate generation start.
     
-    Tries multiple methods in order of preference:
-    1. WSL-specific methods (Windows host audio) - 3 beeps
-    2. Linux native audio systems - 3 beeps
-    3. macOS system sounds - 3 plays
-    4. Windows system beep - 3 beeps
+    Uses a pre-rendered 3-beep WAV and never waits for playback to finish:
+    1. WSL - terminal bell (3 bells)
+    2. Linux - aplay
+    3. macOS - afplay
+    4. Windows - winsound, asynchronously
     5. Terminal bell character - 3 bells
     6. Visual indicator fallback
     """
     try:
-        # Check if running in WSL environment
-        is_wsl = False
-        try:
-            with open('/proc/version', 'r') as f:
-                version_info = f.read().lower()
-                if 'microsoft' in version_info or 'wsl' in version_info:
-                    is_wsl = True
-        except (FileNotFoundError, PermissionError):
-            pass
-        
-        if is_wsl:
-            # WSL-specific approaches
-            try:
-                # Try to use Windows PowerShell to play 3 system sounds
-                subprocess.run([
-                    'powershell.exe', '-c', 
-                    '[console]::beep(800,200); Start-Sleep -Milliseconds 100; [console]::beep(800,200); Start-Sleep -Milliseconds 100; [console]::beep(800,200)'
-                ], check=False, capture_output=True, timeout=5)
-                return
-            except (subprocess.SubprocessError, FileNotFoundError):
-                pass
-            
-            try:
-                # Alternative: Use cmd.exe with 3 echo bells
-                subprocess.run([
-                    'cmd.exe', '/c', 'echo \a & timeout /t 0 >nul & echo \a & timeout /t 0 >nul & echo \a'
-                ], check=False, capture_output=True, timeout=3)
-                return
-            except (subprocess.SubprocessError, FileNotFoundError):
-                pass
-            
-            try:
-                # Try Windows Media Player for a system sound
-                subprocess.run([
-                    'powershell.exe', '-c',
-                    '(New-Object Media.SoundPlayer "C:\\Windows\\Media\\chimes.wav").PlaySync()'
-                ], check=False, capture_output=True, timeout=3)
-                return
-            except (subprocess.SubprocessError, FileNotFoundError):
-                pass
-        
-        elif sys.platform.startswith('linux'):
-            # Native Linux - try multiple approaches
-            try:
-                # Try pactl for PulseAudio systems
-                subprocess.run(['pactl', 'upload-sample', '/usr/share/sounds/alsa/Front_Left.wav', 'bell'],
-                               check=False, capture_output=True, timeout=2)
-                subprocess.run(['pactl', 'play-sample', 'bell'],
-                               check=False, capture_output=True, timeout=2)
-                return
-            except (subprocess.SubprocessError, FileNotFoundError):
-                pass
-
-            try:
-                # Try speaker-test for ALSA
-                subprocess.run(['speaker-test', '-t', 'sine', '-f', '1000', '-l', '1'],
-                               check=False, capture_output=True, timeout=3)
-                return
-            except (subprocess.SubprocessError, FileNotFoundError):
-                pass
-
-            try:
-                # Try beep command if available (3 times)
-                subprocess.run(['beep', '-f', '800', '-l', '200', '-r', '3', '-d', '100'],
-                               check=False, capture_output=True, timeout=3)
-                return
-            except (subprocess.SubprocessError, FileNotFoundError):
-                pass
-                
-        elif sys.platform == 'darwin':
-            # macOS - use afplay with system sound (3 times)
-            try:
-                import time
-                for _ in range(3):
-                    subprocess.run(['afplay', '/System/Library/Sounds/Glass.aiff'],
-                                   check=False, capture_output=True, timeout=2)
-                    time.sleep(0.1)
-                return
-            except (subprocess.SubprocessError, FileNotFoundError):
-                pass
-                
-        elif sys.platform.startswith('win'):
-            # Windows - use built-in beep (3 times)
-            try:
-                import winsound
-                import time
-                for _ in range(3):
-                    winsound.Beep(800, 200)  # 800Hz for 200ms
-                    time.sleep(0.1)  # 100ms pause between beeps
-                return
-            except ImportError:
-                pass
+        beep = _BEEP_HANDLERS.get(_PLATFORM)
+        if beep is not None and beep():
+            return
         
         # Fallback: Terminal bell character (3 times)
-        import time
-        for _ in range(3):
-            print('\a', end='', flush=True)
-            time.sleep(0.1)
+        _ring_terminal_bell()
         
     except Exception:
         # Ultimate fallback: visual indicator with more emphasis
@@ -181,12 +406,18 @@ def play_notification_sound() -> None:
         print("=" * 40)
 
 
+def _play_notification_async() -> None:
+    """Queue play_notification_sound on the worker thread without waiting."""
+    _NOTIFY_EXECUTOR.submit(play_notification_sound)
+
+
 def interactive_feedback_loop(
     generator_func: Callable,
     validator_func: Optional[Callable] = None,
     max_iterations: int = 5,
     task_name: str = "Processing",
-    interactive: bool = False
+    interactive: bool = False,
+    feedback_window: int = 3
 ) -> str:
     """
     Generic interactive feedback loop for iterative content generation.
@@ -200,17 +431,17 @@ def interactive_feedback_loop(
         task_name: Name of the task for display
         interactive: If True, ask for user feedback. If False (default), 
                     run once and return result without user input
+        feedback_window: Number of most recent feedback entries passed to
+                        generator_func, keeping the prompt size bounded
 
     Returns:
         Final generated response
     """
     iteration = 1
-    feedback_history = []
+    feedback_history = deque(maxlen=feedback_window)
 
     while iteration <= max_iterations:
-        print(f"\n{'=' * 60}")
-        print(f"{task_name.upper()} - Iteration {iteration}")
-        print(f"{'=' * 60}")
+        sys.stdout.write(f"\n{_BANNER}\n{task_name.upper()} - Iteration {iteration}\n{_BANNER}\n")
 
         # Generate content
         try:
@@ -236,16 +467,14 @@ def interactive_feedback_loop(
                 else:
                     print("✅ Validation passed!")
 
-            print(f"===Response length:=== {len(response)} characters")
-            print()
-            print()
+            sys.stdout.write(f"===Response length:=== {len(response)} characters\n\n\n")
             print_wrapped(response, width=150)
 
         except Exception as e:
             print(f"Error in {task_name.lower()}: {str(e)}")
             response = f"Error: {str(e)}"
 
-        print(f"\n{'=' * 60}")
+        sys.stdout.write(f"\n{_BANNER}\n")
 
         # If not interactive, return the first successful result
         if not interactive:
@@ -304,41 +533,98 @@ def retry_with_validation(
     """
     retry_count = 0
 
-    while retry_count < max_retries:
-        try:
-            # Play notification sound when generation starts
+    try:
+        while retry_count < max_retries:
+            try:
+                response = generator_func()
+                is_valid, errors = validator_func(response)
 
-            response = generator_func()
-            play_notification_sound()
-            is_valid, errors = validator_func(response)
+                if is_valid:
+                    return response
+                else:
+                    retry_count += 1
+                    print(f"❌ {task_name.capitalize()} failed validation "
+                          f"(Attempt {retry_count}/{max_retries}):")
+                    for error in errors:
+                        print(f"  - {error}")
+
+                    if retry_count < max_retries:
+                        print(f"Retrying {task_name}...")
+                    else:
+                        print(f"Max retries reached for {task_name}. "
+                              "Using last response despite validation issues.")
+                        return response
 
-            if is_valid:
-                return response
-            else:
+            except Exception as e:
                 retry_count += 1
-                print(f"❌ {task_name.capitalize()} failed validation "
-                      f"(Attempt {retry_count}/{max_retries}):")
-                for error in errors:
-                    print(f"  - {error}")
+                print(f"Error in {task_name} "
+                      f"(Attempt {retry_count}/{max_retries}): {str(e)}")
+                if retry_count >= max_retries:
+                    return f"Error: {str(e)}"
 
-                if retry_count < max_retries:
-                    print(f"Retrying {task_name}...")
-                else:
-                    print(f"Max retries reached for {task_name}. "
-                          "Using last response despite validation issues.")
-                    return response
+        return response
+    finally:
+        # Notify once the retries have settled, not after every attempt
+        _play_notification_async()
 
-        except Exception as e:
-            retry_count += 1
-            print(f"Error in {task_name} "
-                  f"(Attempt {retry_count}/{max_retries}): {str(e)}")
-            if retry_count >= max_retries:
-                return f"Error: {str(e)}"
 
-    return response
+# ==================== VALIDATION FUNCTIONS ====================
 
 
-# ==================== VALIDATION FUNCTIONS ====================
+@lru_cache(maxsize=64)
+def extract_context_tools(context: str) -> FrozenSet[str]:
+    """
+    Extract tool names like "(search_yelp)" from a context's conversation_flow.
+    Returns an empty set if the context cannot be parsed.
+    """
+    try:
+        context_data = _json_loads(context)
+        tools_from_context = set()
+
+        if "conversation_flow" in context_data:
+            for flow_item in context_data["conversation_flow"]:
+                for tool in _RE_PAREN.findall(flow_item):
+                    tools_from_context.add(tool.strip())
+
+        return frozenset(tools_from_context)
+
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return frozenset()
+
+
+@lru_cache(maxsize=64)
+def _context_tools_pattern(tools: FrozenSet[str]) -> re.Pattern:
+    """Compile one case-insensitive alternation matching any of the tools."""
+    alternation = "|".join(map(re.escape, sorted(tools, key=len, reverse=True)))
+    # Lookahead so overlapping mentions are all reported
+    return re.compile(f"(?=({alternation}))", re.IGNORECASE)
+
+
+def _find_context_tools(response: str, tools: FrozenSet[str]) -> List[str]:
+    """
+    Return the tools mentioned in the response, scanning it only once.
+
+    The alternation reports the longest tool at each position, so a shorter
+    tool that only appears as a prefix of a longer one is recovered from
+    the matched text.
+    """
+    if not tools:
+        return []
+    hits = {hit.lower() for hit in _context_tools_pattern(tools).findall(response)}
+    return [tool for tool in tools if any(tool.lower() in hit for hit in hits)]
+
+
+@lru_cache(maxsize=8)
+def _complex_marker_pattern(names: Tuple[str, ...]) -> re.Pattern:
+    """Compile one alternation matching any of the #name# markers."""
+    alternation = "|".join(map(re.escape, sorted(names, key=len, reverse=True)))
+    # Lookahead so adjacent markers sharing a '#' are all found
+    return re.compile(f"#(?=({alternation})#)")
+
+
+def _find_complex_markers(response: str, names: Tuple[str, ...]) -> set:
+    """Return the names whose #name# marker appears in the response."""
+    return set(_complex_marker_pattern(names).findall(response))
 
 
 def validate_context_json(response_text: str) -> Tuple[
@@ -349,15 +635,12 @@ def validate_context_json(response_text: str) -> Tuple[
     Returns (is_valid, parsed_json, error_message)
     """
     try:
-        # Try to extract JSON from response (in case there's extra text)
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            json_text = json_match.group()
+        # Parse the first JSON object in place (in case there's extra text)
+        json_start = response_text.find("{")
+        if json_start >= 0:
+            parsed, _ = _JSON_DECODER.raw_decode(response_text, json_start)
         else:
-            json_text = response_text.strip()
-
-        # Parse JSON
-        parsed = json.loads(json_text)
+            parsed = _json_loads(response_text.strip())
 
         # Validate structure
         if not isinstance(parsed, dict):
@@ -375,15 +658,11 @@ def validate_context_json(response_text: str) -> Tuple[
             )
 
         # Validate each context
-        required_keys = [
-            "user_name", "user_role", "user_personality",
-            "what_they_are_doing_for_current_task", "conversation_flow"
-        ]
         for i, context in enumerate(parsed["contexts"]):
             if not isinstance(context, dict):
                 return False, None, f"Context {i + 1} is not an object"
 
-            for key in required_keys:
+            for key in _CONTEXT_REQUIRED_KEYS:
                 if key not in context:
                     return False, None, (
                         f"Context {i + 1} missing required key: {key}"
@@ -425,27 +704,17 @@ def validate_structured_response(
     errors = []
     
     # Check 1: All 5 building block types mentioned
-    required_blocks = [
-        "[CONTEXT_INFORMATION]",
-        "[TOOL_USE_INSTRUCTIONS]",
-        "[USER_PREFERENCES]",
-        "[BACKGROUND_INFORMATION]",
-        "[TONAL_CONTROL]"
+    found_blocks = set(_RE_BLOCK.findall(response))
+    missing_blocks = [
+        f"[{block}]" for block in _STRUCTURED_REQUIRED_BLOCKS
+        if block not in found_blocks
     ]
 
-    missing_blocks = []
-    for block in required_blocks:
-        if block not in response:
-            missing_blocks.append(block)
-
     if missing_blocks:
         errors.append(f"Missing building blocks: {', '.join(missing_blocks)}")
 
     # Check 2: Number of paragraphs (6-8)
-    paragraphs = [p.strip() for p in response.split('\n\n') if p.strip()]
-    paragraphs = [p for p in paragraphs if p.strip().lower() != "you are"]
-
-    paragraph_count = len(paragraphs)
+    paragraph_count = sum(1 for _ in _iter_paragraphs(response))
     if paragraph_count < 6 or paragraph_count > 10:
         errors.append(
             f"Wrong number of paragraphs: {paragraph_count} (should be 6-8)"
@@ -455,7 +724,99 @@ def validate_structured_response(
     return is_valid, errors
 
 
-def validate_requirements_response(response: str, context: Optional[str] = None) -> Tuple[bool, List[str]]:
+def _iter_paragraphs(response: str) -> Iterator[str]:
+    """Yield the stripped, non-empty paragraphs of a response, skipping "you are"."""
+    # Same boundaries as response.split('\n\n') without building the list
+    start = 0
+    while True:
+        end = response.find('\n\n', start)
+        paragraph = response[start:end if end >= 0 else None].strip()
+        if paragraph and paragraph.lower() != "you are":
+            yield paragraph
+        if end < 0:
+            return
+        start = end + 2
+
+
+def _format_violation(
+    building_name: str, complex_name: str, between_text: str, after_text: str
+) -> Optional[str]:
+    """
+    Check the explanations around a [BUILDING_BLOCK] #complex block# pair.
+    Returns an error message, or None if the format is acceptable.
+    """
+    # Count explanations - both parenthetical and double underscore
+    explanations_count = 0
+    underscore_count = 0
+
+    # Check for parenthetical explanations
+    if _RE_LEADING_PAREN.match(between_text):
+        explanations_count += 1
+    if _RE_LEADING_PAREN.match(after_text):
+        explanations_count += 1
+
+    # Check for double underscore content (unparaphrased ideas)
+    if _RE_UNDERSCORE.search(between_text):
+        underscore_count += 1
+    if _RE_UNDERSCORE.search(after_text):
+        underscore_count += 1
+
+    # Validate format choice - new format expects both () and __
+    # Expected format: [BLOCK] (explanation) #complex# (explanation) __unparaphrased__
+    # Note: We're being permissive to allow various valid formats, so only
+    # a pair with no explanation or unparaphrased content is rejected
+    if explanations_count + underscore_count == 0:
+        return (
+            f"Format issue: [{building_name}] and #{complex_name}# "
+            f"need explanations and/or unparaphrased content"
+        )
+    return None
+
+
+def _paragraph_format_violations(paragraph: str) -> List[str]:
+    """Return format violations for the block pairs in one paragraph."""
+    format_violations = []
+    # Walk building and complex blocks in position order; each building
+    # block is checked against the first complex block after it
+    pending_blocks = []
+    block_matches = heapq.merge(
+        _RE_BLOCK.finditer(paragraph), _RE_COMPLEX.finditer(paragraph),
+        key=lambda match: match.start()
+    )
+
+    for match in block_matches:
+        if match.re is _RE_BLOCK:
+            pending_blocks.append(match)
+            continue
+
+        complex_start = match.start()
+        # Check what's after the complex block
+        after_text = paragraph[match.end():].strip()
+        unpaired_blocks = []
+
+        for building_match in pending_blocks:
+            building_pos = building_match.end()
+            if complex_start <= building_pos:
+                unpaired_blocks.append(building_match)
+                continue
+
+            # Check what's between building block and complex block
+            between_text = paragraph[building_pos:complex_start].strip()
+            violation = _format_violation(
+                building_match.group(1), match.group(1), between_text, after_text
+            )
+            if violation:
+                format_violations.append(violation)
+
+        pending_blocks = unpaired_blocks
+
+    return format_violations
+
+
+def validate_requirements_response(
+    response: str, context: Optional[str] = None, context_tools: Optional[FrozenSet[str]] = None,
+    deep: bool = True
+) -> Tuple[bool, List[str]]:
     """
     Validate the requirements structure response according to complex_block_generation.md.
     
@@ -467,35 +828,51 @@ def validate_requirements_response(response: str, context: Optional[str] = None)
     - Proper paragraph count (6-8)
     - Concise explanations without redundant word lists
     - No specific tool references from user context
+
+    Checks run cheapest first. The per-paragraph format check only runs
+    when every other check passed, and is skipped entirely with deep=False,
+    so a response that will be retried anyway is rejected quickly.
+
+    Callers validating many responses for one context can pass
+    context_tools from extract_context_tools instead of the raw context.
+    Results are memoized, so a retry that returns an identical response
+    is not validated twice.
     """
+    if context_tools is None and context:
+        context_tools = extract_context_tools(context)
+
+    errors = _requirements_errors(response, context_tools or frozenset(), deep)
+    return len(errors) == 0, list(errors)
+
+
+@lru_cache(maxsize=256)
+def _requirements_errors(
+    response: str, context_tools: FrozenSet[str], deep: bool
+) -> Tuple[str, ...]:
+    """Run the validate_requirements_response checks; returns the errors."""
     errors = []
     
-    # Print response length    
     # Load complex blocks from JSON to check coverage
-    complex_blocks = load_json_file("./complex_block.json")
+    complex_blocks = _load_json_cached("./complex_block.json")
     required_complex_blocks = list(complex_blocks.keys())
 
     # Check 1: Number of paragraphs (6-8)
-    paragraphs = [p.strip() for p in response.split('\n\n') if p.strip()]
-    paragraphs = [p for p in paragraphs if p.strip().lower() != "you are"]
-
-    paragraph_count = len(paragraphs)
+    paragraph_count = sum(1 for _ in _iter_paragraphs(response))
     if paragraph_count < 6 or paragraph_count > 10:
         errors.append(
             f"Wrong number of paragraphs: {paragraph_count} (should be 6-8)"
         )
 
     # Check 2: Should contain building blocks with proper format
-    building_blocks_found = re.findall(r'\[([A-Z_]+)\]', response)
-    if not building_blocks_found:
+    if not _RE_BLOCK.search(response):
         errors.append("Missing building block format [BLOCK_NAME]")
 
     # Check 3: Complex block coverage - ALL 7 types must be included
-    missing_complex_blocks = []
-    for complex_block_name in required_complex_blocks:
-        # Check for #complex_block_name# format
-        if f"#{complex_block_name}#" not in response:
-            missing_complex_blocks.append(complex_block_name)
+    # One scan for all #complex_block_name# markers
+    found_complex_blocks = _find_complex_markers(response, tuple(required_complex_blocks))
+    missing_complex_blocks = [
+        name for name in required_complex_blocks if name not in found_complex_blocks
+    ]
 
     # STRICT REQUIREMENT: ALL 7 complex blocks must be included
     if missing_complex_blocks:
@@ -505,71 +882,29 @@ def validate_requirements_response(response: str, context: Optional[str] = None)
             f"{', '.join(missing_complex_blocks)}"
         )
 
-    # Check 4: Validate format appropriateness (separate vs merged)
-    format_violations = []
+    # Check 4: Look for tool references from context (should be avoided)
+    tool_violations = []
     
-    for paragraph in paragraphs:
-        # Find building blocks and complex blocks in this paragraph
-        building_matches = list(re.finditer(r'\[([A-Z_]+)\]', paragraph))
-        complex_matches = list(re.finditer(r'#([^#]+)#', paragraph))
-        
-        for building_match in building_matches:
-            building_name = building_match.group(1)
-            building_pos = building_match.end()
-            
-            # Look for complex blocks after this building block
-            for complex_match in complex_matches:
-                if complex_match.start() > building_pos:
-                    complex_name = complex_match.group(1)
-                    complex_pos = complex_match.end()
-                    
-                    # Check what's between building block and complex block
-                    between_text = paragraph[building_pos:complex_match.start()].strip()
-                    
-                    # Check what's after the complex block
-                    after_text = paragraph[complex_pos:].strip()
-                    
-                    # Count explanations - both parenthetical and double underscore
-                    explanations_count = 0
-                    underscore_count = 0
-                    
-                    # Check for parenthetical explanations
-                    if re.match(r'^\s*\([^)]+\)', between_text):
-                        explanations_count += 1
-                    if re.match(r'^\s*\([^)]+\)', after_text):
-                        explanations_count += 1
-                    
-                    # Check for double underscore content (unparaphrased ideas)
-                    if re.search(r'__[^_]+__', between_text):
-                        underscore_count += 1
-                    if re.search(r'__[^_]+__', after_text):
-                        underscore_count += 1
-                    
-                    # Validate format choice - new format expects both () and __
-                    # Expected format: [BLOCK] (explanation) #complex# (explanation) __unparaphrased__
-                    total_content = explanations_count + underscore_count
-                    
-                    if explanations_count >= 1 and underscore_count >= 1:
-                        # Good: Has both parenthetical explanations and unparaphrased content
-                        pass
-                    elif explanations_count >= 2 and underscore_count == 0:
-                        # Acceptable: Traditional separate format without unparaphrased content
-                        pass
-                    elif explanations_count == 1 and underscore_count == 0:
-                        # Acceptable: Traditional merged format
-                        pass
-                    elif total_content == 0:
-                        format_violations.append(
-                            f"Format issue: [{building_name}] and #{complex_name}# "
-                            f"need explanations and/or unparaphrased content"
-                        )
-                    # Note: We're being permissive to allow various valid formats
-                    break
+    if context_tools:
+        # Check if any tools from context are mentioned in response
+        for tool in _find_context_tools(response, context_tools):
+            tool_violations.append(f"Context tool reference found: {tool}")
+    
+    if tool_violations:
+        errors.append(
+            "Writing guideline violation: Avoid mentioning specific tools from user context. "
+            f"Found {len(tool_violations)} tool references."
+        )
+
+    # Fail fast: the response will be regenerated anyway
+    if errors or not deep:
+        return tuple(errors)
 
-    if format_violations:
-        errors.extend(format_violations)
+    # Check 5: Validate format appropriateness (separate vs merged)
+    for paragraph in _iter_paragraphs(response):
+        errors.extend(_paragraph_format_violations(paragraph))
 
-    # # Check 5: Look for oververbose explanations with redundant word lists
+    # # Check 6: Look for oververbose explanations with redundant word lists
     # verbose_violations = []
     
     # # Pattern to detect redundant word lists like "analyze (examine, review, assess)"
@@ -589,44 +924,12 @@ def validate_requirements_response(response: str, context: Optional[str] = None)
     #         f"Found {len(verbose_violations)} instances of similar meaning words in parentheses."
     #     )
 
-    # Check 6: Look for tool references from context (should be avoided)
-    tool_violations = []
-    
-    if context:
-        # Extract tool names from context conversation_flow
-        try:
-            import json
-            context_data = json.loads(context)
-            tools_from_context = set()
-            
-            # Extract tools from conversation_flow
-            if "conversation_flow" in context_data:
-                for flow_item in context_data["conversation_flow"]:
-                    # Look for tools in parentheses like "(search_yelp)"
-                    tool_matches = re.findall(r'\(([^)]+)\)', flow_item)
-                    for tool in tool_matches:
-                        tools_from_context.add(tool.strip())
-            
-            # Check if any tools from context are mentioned in response
-            for tool in tools_from_context:
-                if re.search(re.escape(tool), response, re.IGNORECASE):
-                    tool_violations.append(f"Context tool reference found: {tool}")
-                    
-        except (json.JSONDecodeError, KeyError, TypeError):
-            # If context parsing fails, skip tool validation
-            pass
-    
-    if tool_violations:
-        errors.append(
-            "Writing guideline violation: Avoid mentioning specific tools from user context. "
-            f"Found {len(tool_violations)} tool references."
-        )
-
-    is_valid = len(errors) == 0
-    return is_valid, errors
+    return tuple(errors)
 
 
-def validate_populate_response(response: str, context: Optional[str] = None) -> Tuple[bool, List[str]]:
+def validate_populate_response(
+    response: str, context: Optional[str] = None, context_tools: Optional[FrozenSet[str]] = None
+) -> Tuple[bool, List[str]]:
     """
     Validate the populated block response according to block_population.md.
     
@@ -635,43 +938,39 @@ def validate_populate_response(response: str, context: Optional[str] = None) ->
     - No block name references like [CONTEXT_INFORMATION]
     - No adjective lists
     - Response length and quality
+
+    Callers validating many responses for one context can pass
+    context_tools from extract_context_tools instead of the raw context.
+    Results are memoized like validate_requirements_response.
     """
+    if context_tools is None and context:
+        context_tools = extract_context_tools(context)
+
+    errors = _populate_errors(response, context_tools or frozenset())
+    return len(errors) == 0, list(errors)
+
+
+@lru_cache(maxsize=256)
+def _populate_errors(response: str, context_tools: FrozenSet[str]) -> Tuple[str, ...]:
+    """Run the validate_populate_response checks; returns the errors."""
     errors = []
     
     # Check 1: No block name references
-    block_references = re.findall(r'\[([A-Z_]+)\]', response)
+    block_references = _RE_BLOCK.findall(response)
     if block_references:
         errors.append(f"Block name references found: {', '.join(block_references)}")
     
-    complex_block_references = re.findall(r'#([^#]+)#', response)
+    complex_block_references = _RE_COMPLEX.findall(response)
     if complex_block_references:
         errors.append(f"Complex block references found: {', '.join(complex_block_references)}")
     
     # Check 2: No tool references from context
     tool_violations = []
     
-    if context:
-        try:
-            import json
-            context_data = json.loads(context)
-            tools_from_context = set()
-            
-            # Extract tools from conversation_flow
-            if "conversation_flow" in context_data:
-                for flow_item in context_data["conversation_flow"]:
-                    # Look for tools in parentheses like "(search_yelp)"
-                    tool_matches = re.findall(r'\(([^)]+)\)', flow_item)
-                    for tool in tool_matches:
-                        tools_from_context.add(tool.strip())
-            
-            # Check if any tools from context are mentioned in response
-            for tool in tools_from_context:
-                if re.search(re.escape(tool), response, re.IGNORECASE):
-                    tool_violations.append(f"Context tool reference found: {tool}")
-                    
-        except (json.JSONDecodeError, KeyError, TypeError):
-            # If context parsing fails, skip tool validation
-            pass
+    if context_tools:
+        # Check if any tools from context are mentioned in response
+        for tool in _find_context_tools(response, context_tools):
+            tool_violations.append(f"Context tool reference found: {tool}")
     
     if tool_violations:
         errors.append(
@@ -685,6 +984,46 @@ def validate_populate_response(response: str, context: Optional[str] = None) ->
     # if adjective_matches:
     #     errors.append(f"Adjective lists found: {', '.join(adjective_matches[:3])}...")  # Show first 3
     
+    return tuple(errors)
+
+
+def _parse_pipeline_sections(response: str) -> Dict[str, str]:
+    """Return the stripped content of each tagged pipeline section, by tag."""
+    return {
+        tag: content.strip()
+        for tag, content in _RE_PIPELINE_SECTION.findall(response)
+    }
+
+
+def validate_pipeline_response(
+    response: str, context: Optional[str] = None, context_tools: Optional[FrozenSet[str]] = None
+) -> Tuple[bool, List[str]]:
+    """
+    Validate a unified pipeline response from build_full_system_prompt.
+
+    Checks for:
+    - All three tagged sections present
+    - COMPLEX_BLOCK passes validate_requirements_response
+    - POPULATED passes validate_populate_response
+    """
+    if context_tools is None and context:
+        context_tools = extract_context_tools(context)
+
+    sections = _parse_pipeline_sections(response)
+    errors = [f"Missing <{tag}> section" for tag in _PIPELINE_SECTIONS if tag not in sections]
+
+    if "COMPLEX_BLOCK" in sections:
+        _, complex_errors = validate_requirements_response(
+            sections["COMPLEX_BLOCK"], context_tools=context_tools
+        )
+        errors.extend(f"COMPLEX_BLOCK: {error}" for error in complex_errors)
+
+    if "POPULATED" in sections:
+        _, populate_errors = validate_populate_response(
+            sections["POPULATED"], context_tools=context_tools
+        )
+        errors.extend(f"POPULATED: {error}" for error in populate_errors)
+
     is_valid = len(errors) == 0
     return is_valid, errors
 
@@ -692,46 +1031,38 @@ def validate_populate_response(response: str, context: Optional[str] = None) ->
 # ==================== MAIN FUNCTIONS ====================
 
 
+def _validate_context_result(response: str) -> Tuple[bool, List[str]]:
+    """Adapt validate_context_json to the (is_valid, errors) validator shape."""
+    is_valid, parsed_json, error_message = validate_context_json(response)
+    if is_valid:
+        print("Generated Context Options:")
+        return True, []
+    else:
+        return False, [error_message]
+
+
 def generate_context(provided_inspiration: str, available_tools: str = "", current_system: str = "", interactive: bool = False) -> str:
     """Generate user contexts based on inspiration with optional interactive feedback."""
     
     # Load instruction template from markdown file
-    instructions = load_text_file("./instructions/context_generation.md")
+    instructions = _load_text_cached("./instructions/context_generation.md")
     system_prompt = instructions.replace("{available_tools}", available_tools).replace("{current_system}", current_system)
 
-    def generate_content(iteration: int, feedback_history: List[str]) -> str:
+    def generate_content(iteration: int, feedback_history: Sequence[str]) -> str:
         # Prepare the user message with feedback if available
         if feedback_history:
-            user_message = f"""Create 5 diverse user contexts based on this inspiration: {provided_inspiration} that suitable for the following tools: {available_tools}
-
-Previous feedback from user:
-{chr(10).join(feedback_history)}
-
-Please incorporate this feedback and generate improved contexts."""
+            user_message = _CONTEXT_FEEDBACK_TEMPLATE.render(
+                inspiration=provided_inspiration,
+                tools=available_tools,
+                feedback="\n".join(feedback_history),
+            )
         else:
-            user_message = f"Create 5 diverse user contexts based on this inspiration: {provided_inspiration}"
-            
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ]
+            user_message = _CONTEXT_TEMPLATE.render(inspiration=provided_inspiration)
 
         # Use retry with validation
-        def generator():
-            return DEFAULT_MODEL.generate(messages)
-
-        def validator(response):
-            is_valid, parsed_json, error_message = validate_context_json(
-                response
-            )
-            if is_valid:
-                print("Generated Context Options:")
-                return True, []
-            else:
-                return False, [error_message]
-
         return retry_with_validation(
-            generator, validator, max_retries=3,
+            partial(_generate_once, system_prompt, user_message),
+            _validate_context_result, max_retries=3,
             task_name="context generation"
         )
 
@@ -758,45 +1089,30 @@ def generate_block(provided_inspiration: str, interactive: bool = False) -> str:
     """
     
     # Load instruction template and example from files
-    instructions = load_text_file("./instructions/block_generation.md")
-    build_block = load_text_file("./build_block.json")
+    instructions = _load_text_cached("./instructions/block_generation.md")
+    build_block = _load_text_cached("./build_block.json")
     system_prompt = f"{instructions}\n\nReference example: {build_block}"
+    validator = partial(
+        validate_structured_response, provided_inspiration=provided_inspiration
+    )
 
-    def generate_content(iteration: int, feedback_history: List[str]) -> str:
-        user_message = ""
-
-        if provided_inspiration:
-            user_message += f"""
-Transform these ideas using different wording and distribute them naturally across the paragraphs. They can appear at any position within each paragraph.
-
-Inspiration ideas to incorporate throughout the paragraphs is in bullet points.
-INSPIRATION: 
-
-{provided_inspiration}
+    # The user message only changes when there is feedback to append
+    base_user_message = ""
+    if provided_inspiration:
+        base_user_message = _BLOCK_TEMPLATE.render(inspiration=provided_inspiration)
 
-ONLY RETURN THE BLOCK STRUCTURE, NO OTHER TEXT.
-"""
+    def generate_content(iteration: int, feedback_history: Sequence[str]) -> str:
+        user_message = base_user_message
 
         # Add feedback history if exists
         if feedback_history:
-            user_message += ("\n\nPrevious feedback to incorporate:\n" +
-                             "\n".join(feedback_history))
+            user_message = (user_message + "\n\nPrevious feedback to incorporate:\n" +
+                            "\n".join(feedback_history)).strip()
 
         # Generate with retry and validation
-        def generator():
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message.strip()}
-            ]
-            return DEFAULT_MODEL.generate(messages)
-
-        def validator(response):
-            return validate_structured_response(
-                response, provided_inspiration
-            )
-
         return retry_with_validation(
-            generator, validator, max_retries=3,
+            partial(_generate_once, system_prompt, user_message),
+            validator, max_retries=3,
             task_name="structured prompt generation"
         )
 
@@ -820,38 +1136,28 @@ def generate_complex_block(
     """
 
     # Load instruction template and complex block data
-    instructions = load_text_file("./instructions/complex_block_generation.md")    
+    instructions = _load_text_cached("./instructions/complex_block_generation.md")
     system_prompt = instructions
+    # Parse the context's tools once for every validation in the loop
+    context_tools = extract_context_tools(context) if context else frozenset()
+    validator = partial(validate_requirements_response, context_tools=context_tools)
+
+    # The user message only changes when there is feedback to append
+    base_user_message = _COMPLEX_BLOCK_TEMPLATE.render(
+        context=context or "General use",
+        block_output=block_output,
+    )
 
-    def generate_content(iteration: int, feedback_history: List[str]) -> str:
-        user_message = f"""
-
-Context: {context if context else "General use"}
-
-Add relevant complex block identifiers to this building block structure:
-
-{block_output}
-
-ONLY RETURN THE COMPLEX BLOCK STRUCTURE, NO OTHER TEXT.
-"""
-
+    def generate_content(iteration: int, feedback_history: Sequence[str]) -> str:
+        user_message = base_user_message
         if feedback_history:
             user_message += ("\n\nPrevious feedback to incorporate:\n" +
                              "\n".join(feedback_history))
 
         # Generate with retry and validation
-        def generator():
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message.strip()}
-            ]
-            return DEFAULT_MODEL.generate(messages)
-
-        def validator(response):
-            return validate_requirements_response(response, context)
-
         return retry_with_validation(
-            generator, validator, max_retries=3,
+            partial(_generate_once, system_prompt, user_message),
+            validator, max_retries=3,
             task_name="complex block addition"
         )
 
@@ -880,65 +1186,41 @@ def populate_block(
         String: Complete system prompt in natural English
     """
     
-    # Load definitions only
-    build_blocks = load_json_file("./build_block.json")
-    complex_blocks = load_json_file("./complex_block.json")
-    
-    # Create definitions information for blocks
-    block_definitions = ""
-    for block_name, block_data in build_blocks.items():
-        block_definitions += f"\n{block_name.upper()}:\n"
-        block_definitions += f"Purpose: {block_data['what_it_is']}\n"
-        block_definitions += f"Rule: {block_data['rule']}\n"
-    
-    complex_definitions = ""
-    for block_name, block_data in complex_blocks.items():
-        complex_definitions += f"\n{block_name}:\n"
-        complex_definitions += f"Definition: {block_data['Definition']}\n"
-    
-    # Load instruction template
-    instructions = load_text_file("./instructions/block_population.md")
-    
+    # Load definitions and instruction template (cached after first call)
+    block_definitions = _block_definitions()
+    complex_definitions = _complex_definitions()
+    instructions = _load_text_cached("./instructions/block_population.md")
+
+    # The system prompt is static across calls so the provider can reuse its
+    # cached prefix; per-call text (including system_prompt_must) stays in
+    # the user message
+    system_prompt = (
+        f"{instructions}\n\n"
+        f"BUILDING BLOCK DEFINITIONS:{block_definitions}\n"
+        f"COMPLEX BLOCK DEFINITIONS:{complex_definitions}"
+    )
 
-    if system_prompt_must:
-        system_prompt = f"{instructions}\n\nRequired text to include: {system_prompt_must}"
-    else:
-        system_prompt = f"{instructions}"
+    # Parse the context's tools once for every validation in the loop
+    context_tools = extract_context_tools(context) if context else frozenset()
+    validator = partial(validate_populate_response, context_tools=context_tools)
     
-    def generate_content(iteration: int, feedback_history: List[str]) -> str:
-        user_message = f"""
-Convert this structured block format into a natural English system prompt:
-
-CONTEXT:
-{context}
-
-REQUIRED TEXT (must include word-for-word): could be empty if not provided
-"{system_prompt_must}"
-
-STRUCTURED INPUT:
-{complex_block}
-
-ONLY RETURN THE SYSTEM PROMPT, NO OTHER TEXT.
+    # The user message only changes when there is feedback to append
+    base_user_message = _POPULATE_TEMPLATE.render(
+        context=context,
+        must=system_prompt_must,
+        complex_block=complex_block,
+    )
 
-"""
-        
+    def generate_content(iteration: int, feedback_history: Sequence[str]) -> str:
+        user_message = base_user_message
         if feedback_history:
             user_message += ("\n\nPrevious feedback to incorporate:\n" +
                              "\n".join(feedback_history))
         
         # Generate with retry and validation
-        def generator():
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message.strip()}
-            ]
-            return DEFAULT_MODEL.generate(messages)
-
-        def validator(response):
-            return validate_populate_response(response, context)
-
         return retry_with_validation(
-            generator, validator, max_retries=3,
+            partial(_generate_once, system_prompt, user_message),
+            validator, max_retries=3,
             task_name="block population"
         )
     
@@ -970,44 +1252,144 @@ def add_system_info(
     """
 
     # Load instruction template
-    instructions = load_text_file("./instructions/system_info_enhancement.md")
+    instructions = _load_text_cached("./instructions/system_info_enhancement.md")
     system_prompt = instructions
 
-    def generate_content(iteration: int, feedback_history: List[str]) -> str:
-        user_message = f"""
-CONTEXT:
-{context}
+    # The user message only changes when there is feedback to append
+    base_user_message = _SYSTEM_INFO_TEMPLATE.render(
+        context=context,
+        system_settings=system_settings,
+        complex_structure=complex_structure,
+    )
 
-SYSTEM SETTINGS:
-{system_settings}
+    def generate_content(iteration: int, feedback_history: Sequence[str]) -> str:
+        user_message = base_user_message
+        if feedback_history:
+            user_message += ("\n\nPrevious feedback to incorporate:\n" +
+                             "\n".join(feedback_history))
 
-COMPLEX STRUCTURE:
-{complex_structure}
+        return _generate_once(system_prompt, user_message)
 
-return the system prompt in the same format as the complex structure with the system info added to the first CONTEXT_INFORMATION block.
+    return interactive_feedback_loop(
+        generate_content,
+        max_iterations=3,
+        task_name="Adding System Info to First Context Information Block",
+        interactive=interactive
+    )
 
-ONLY RETURN THE SYSTEM PROMPT, NO OTHER TEXT.
 
-"""
+def build_full_system_prompt(
+    block_output: str, context: str, system_prompt_must: str, system_settings: str,
+    interactive: bool = False
+) -> Dict[str, str]:
+    """
+    Run generate_complex_block, add_system_info and populate_block as a
+    single compound model request instead of three chained calls.
 
+    Args:
+        block_output: Building block structure from generate_block
+        context: String containing user context information
+        system_prompt_must: Required text that must be included word-for-word
+                           in the final system prompt
+        system_settings: String containing system-specific settings and
+                        configurations
+
+    Returns:
+        Dict with the "complex_block", "with_system_info" and "populated"
+        outputs and the unparsed model response under "raw". If generation
+        failed or a section is missing, "error" describes the problem and
+        the missing sections are empty strings
+    """
+
+    # Static prefix: pipeline format, then each stage's own instructions
+    system_prompt = "\n\n".join([
+        _load_text_cached("./instructions/unified_pipeline.md"),
+        _load_text_cached("./instructions/complex_block_generation.md"),
+        _load_text_cached("./instructions/system_info_enhancement.md"),
+        _load_text_cached("./instructions/block_population.md"),
+        f"BUILDING BLOCK DEFINITIONS:{_block_definitions()}",
+        f"COMPLEX BLOCK DEFINITIONS:{_complex_definitions()}",
+    ])
+    # Parse the context's tools once for every validation in the loop
+    context_tools = extract_context_tools(context) if context else frozenset()
+    validator = partial(validate_pipeline_response, context_tools=context_tools)
+
+    # The user message only changes when there is feedback to append
+    base_user_message = _PIPELINE_TEMPLATE.render(
+        context=context,
+        system_settings=system_settings,
+        must=system_prompt_must,
+        block_output=block_output,
+    )
+
+    def generate_content(iteration: int, feedback_history: Sequence[str]) -> str:
+        user_message = base_user_message
         if feedback_history:
             user_message += ("\n\nPrevious feedback to incorporate:\n" +
                              "\n".join(feedback_history))
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message.strip()}
-        ]
-
-        return DEFAULT_MODEL.generate(messages)
+        # Generate with retry and validation
+        return retry_with_validation(
+            partial(_generate_once, system_prompt, user_message),
+            validator, max_retries=3,
+            task_name="unified pipeline"
+        )
 
-    return interactive_feedback_loop(
+    response = interactive_feedback_loop(
         generate_content,
-        max_iterations=3,
-        task_name="Adding System Info to First Context Information Block",
+        max_iterations=5,
+        task_name="Building Full System Prompt",
         interactive=interactive
     )
 
+    sections = _parse_pipeline_sections(response)
+    result = {key: sections.get(tag, "") for tag, key in _PIPELINE_SECTIONS.items()}
+    result["raw"] = response
+
+    if response.startswith("Error:"):
+        result["error"] = response
+    else:
+        missing = [tag for tag in _PIPELINE_SECTIONS if tag not in sections]
+        if missing:
+            result["error"] = f"Missing sections: {', '.join(missing)}"
+    return result
+
+
+# ==================== BATCH FUNCTIONS ====================
+
+
+async def generate_async(messages: List[Dict[str, str]], **kwargs) -> str:
+    """Run cached_generate in a worker thread so several calls can overlap."""
+    return await asyncio.to_thread(cached_generate, messages, **kwargs)
+
+
+async def populate_block_async(
+    complex_block: str, context: str, system_prompt_must: str
+) -> str:
+    """Run a non-interactive populate_block in a worker thread."""
+    return await asyncio.to_thread(
+        populate_block, complex_block, context, system_prompt_must
+    )
+
+
+async def populate_blocks_batch(items: List[Tuple[str, str, str]]) -> List[str]:
+    """
+    Populate several independent blocks concurrently.
+
+    Args:
+        items: (complex_block, context, system_prompt_must) tuples
+
+    Returns:
+        List of populated system prompts, in the same order as items.
+        Progress output from the concurrent runs may interleave.
+
+    In a notebook, `await populate_blocks_batch(items)` directly; from a
+    script, wrap it in asyncio.run.
+    """
+    return list(await asyncio.gather(
+        *(populate_block_async(*item) for item in items)
+    ))
+
 
 # ==================== FORMALIZATION FUNCTIONS ====================
 
@@ -1026,7 +1408,15 @@ def formalize_system_prompt(
     
     Returns:
         String: Formalized system prompt with natural English
+
+    Non-interactive results are cached, so formalizing the same prompt
+    again skips the model call.
     """
+    cache_key = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    if not interactive:
+        cached = FORMALIZE_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
     
     # Load instruction template for formalization
     instructions = """You are a professional editor that converts system prompts into direct, natural English.
@@ -1051,85 +1441,97 @@ Transform the provided system prompt to use:
 - The overall structure and organization
 - The core meaning or intent of any instruction"""
 
-    def generate_content(iteration: int, feedback_history: List[str]) -> str:
-        user_message = f"""Please formalize this system prompt using direct, natural English with proper sentence subjects:
-
-{system_prompt}
-
-Remember: Do NOT change any text inside quotation marks. Only improve the language structure and directness."""
+    # The user message only changes when there is feedback to append
+    base_user_message = _FORMALIZE_TEMPLATE.render(system_prompt=system_prompt)
 
+    def generate_content(iteration: int, feedback_history: Sequence[str]) -> str:
+        user_message = base_user_message
         if feedback_history:
             user_message += ("\n\nPrevious feedback to incorporate:\n" +
                              "\n".join(feedback_history))
 
-        messages = [
-            {"role": "system", "content": instructions},
-            {"role": "user", "content": user_message.strip()}
-        ]
-
-        return DEFAULT_MODEL.generate(messages)
+        return _generate_once(instructions, user_message)
 
-    return interactive_feedback_loop(
+    response = interactive_feedback_loop(
         generate_content,
         max_iterations=3,
         task_name="Formalizing System Prompt",
         interactive=interactive
     )
 
+    # Unlike LLMCache.generate this keeps a sampled response: any accepted
+    # rewrite of the same prompt is equally valid, and nothing retries on it
+    if not interactive and not response.startswith("Error:"):
+        FORMALIZE_CACHE.set(cache_key, response)
+    return response
+
 
 # ==================== ANALYSIS FUNCTIONS ====================
 
 
-def analyze_complex_block_coverage(response: str) -> Tuple[int, int]:
+def analyze_complex_block_coverage(response: str, verbose: bool = True) -> Tuple[int, int]:
     """
     Analyze and display complex block coverage in the response.
     Shows which blocks are included and which are missing.
+    Pass verbose=False to only return the (found, missing) counts.
     """
     # Load complex blocks from JSON
-    complex_blocks = load_json_file("./complex_block.json")
+    complex_blocks = _load_json_cached("./complex_block.json")
 
     all_complex_blocks = list(complex_blocks.keys())
-    found_blocks = []
-    missing_blocks = []
 
-    print("=== COMPLEX BLOCK COVERAGE ANALYSIS ===")
-    print(f"Total available complex blocks: {len(all_complex_blocks)}")
-    print()
+    # One scan for all #block_name# markers; the counts come straight from
+    # set algebra, ordered lists are only built for the report
+    found_set = _find_complex_markers(response, tuple(all_complex_blocks))
+    missing_set = complex_blocks.keys() - found_set
+    found_count = len(all_complex_blocks) - len(missing_set)
+
+    if not verbose:
+        return found_count, len(missing_set)
 
+    missing_blocks = [name for name in all_complex_blocks if name in missing_set]
+
+    # Collect the report and write it once at the end
+    lines = [
+        "=== COMPLEX BLOCK COVERAGE ANALYSIS ===",
+        f"Total available complex blocks: {len(all_complex_blocks)}",
+        "",
+    ]
     for block_name in all_complex_blocks:
-        if f"#{block_name}#" in response:
-            found_blocks.append(block_name)
-            print(f"✅ FOUND: {block_name}")
+        if block_name not in missing_set:
+            lines.append(f"✅ FOUND: {block_name}")
         else:
-            missing_blocks.append(block_name)
-            print(f"❌ MISSING: {block_name}")
-
-    print()
-    print(f"Coverage Summary: {len(found_blocks)}/{len(all_complex_blocks)} "
-          "complex blocks included")
-    coverage_pct = (len(found_blocks) / len(all_complex_blocks)) * 100
-    print(f"Coverage Percentage: {coverage_pct:.1f}%")
+            lines.append(f"❌ MISSING: {block_name}")
+
+    coverage_pct = (found_count / len(all_complex_blocks)) * 100
+    lines += [
+        "",
+        f"Coverage Summary: {found_count}/{len(all_complex_blocks)} "
+        "complex blocks included",
+        f"Coverage Percentage: {coverage_pct:.1f}%",
+    ]
 
     if missing_blocks:
-        print(f"\nMissing blocks ({len(missing_blocks)}):")
+        lines.append(f"\nMissing blocks ({len(missing_blocks)}):")
         for block in missing_blocks:
-            print(f"  - {block}")
+            lines.append(f"  - {block}")
             definition = complex_blocks[block]['Definition']
-            print(f"    Definition: {definition}")
+            lines.append(f"    Definition: {definition}")
 
-    return len(found_blocks), len(missing_blocks)
+    sys.stdout.write("\n".join(lines) + "\n")
+    return found_count, len(missing_blocks)
 
 
 def show_all_complex_blocks():
     """Display all available complex blocks with their definitions."""
-    complex_blocks = load_json_file("./complex_block.json")
+    complex_blocks = _load_json_cached("./complex_block.json")
 
-    print("=== ALL AVAILABLE COMPLEX BLOCKS ===")
+    lines = ["=== ALL AVAILABLE COMPLEX BLOCKS ==="]
     for i, (block_name, block_data) in enumerate(complex_blocks.items(), 1):
-        print(f"{i}. {block_name}")
-        print(f"   Definition: {block_data['Definition']}")
-        print(f"   Examples: {len(block_data['Examples'])} provided")
-        print()
-
-
-
+        lines += [
+            f"{i}. {block_name}",
+            f"   Definition: {block_data['Definition']}",
+            f"   Examples: {len(block_data['Examples'])} provided",
+            "",
+        ]
+    sys.stdout.write("\n".join(lines) + "\n")
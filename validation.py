@@ -1,20 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Final
 
 def check_min_length(text: str, min_length: int = 1500) -> bool:
-    if len(text) < min_length:
-        print(f"Response is too short. Expected at least {min_length} characters, got {len(text)}")
+    text_length = len(text)
+    if text_length < min_length:
+        print(f"Response is too short. Expected at least {min_length} characters, got {text_length}")
+        return False
 
-    return len(text) >= min_length
+    return True
+
+# Ordered cheapest first so expensive checks are skipped once one fails
+CHECK_LIST : Final = (check_min_length,)
+
+def validate_response(text: str, parallel: bool = False) -> bool:
+    # Checks are independent, so slow ones (e.g. model-based) can run
+    # concurrently; latency is then the slowest check rather than the sum
+    if parallel and len(CHECK_LIST) > 1:
+        # Not a with-block: its shutdown would wait for every running check
+        executor = ThreadPoolExecutor(max_workers=len(CHECK_LIST))
+        try:
+            futures = [executor.submit(check_func, text) for check_func in CHECK_LIST]
 
-def check_if_con
+            for future in as_completed(futures):
 
-def validate_response(text: str) -> bool:
+                if not future.result():
+                    return False
 
-    CHECK_LIST : Final = [check_min_length]
+            return True
+        finally:
+            # Return without waiting; checks still running finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
 
     for check_func in CHECK_LIST:
-        
+
         if not check_func(text):
             return False
-        
+
     return True